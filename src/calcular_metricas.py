@@ -6,6 +6,8 @@ import calendar
 # Ruta de la base de datos (se asume que ya fue creada con setup_db.py)
 import os
 
+from shards import MODO_SHARDS, UNIDADES_NEGOCIO, conectar_shard, verificar_shards, ejecutar_en_paralelo
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'db', 'database.db')
 
 
@@ -18,13 +20,9 @@ def calcular_metricas():
     
     Estos cálculos se basan en datos acumulativos hasta el **último día del mes** (para reflejar la actividad completa).
     Los resultados se insertan en la tabla 'historico_kpis' para su posterior análisis.
-    """
-    # Abrir conexión con la base de datos
-    conn = sqlite3.connect(DB_PATH)
-    
-    # Definir las unidades de negocio según lo especificado
-    unidades_negocio = ["Mercado Libre", "Mercado Pago", "Mercado Envíos"]
 
+    En el modo "shards" cada BU se calcula en paralelo sobre su propio archivo de base de datos.
+    """
     # ------------------------------------------------------------------------------
     # Generar una lista de fechas (como cadenas) para el **último día** de cada mes del 2024.
     # Se utiliza calendar.monthrange para obtener el número de días de cada mes.
@@ -36,70 +34,92 @@ def calcular_metricas():
         fecha = date(2024, mes, ultimo_dia)
         meses.append(fecha.strftime("%Y-%m-%d"))
 
+    if MODO_SHARDS:
+        # Verificar los shards una sola vez, antes de lanzar los hilos
+        verificar_shards()
+        # Cada BU lee y escribe únicamente su shard, por lo que no hay contención entre hilos.
+        # La conexión se abre dentro de cada hilo: las conexiones de sqlite3 no se comparten entre hilos.
+        ejecutar_en_paralelo(lambda unidad: calcular_metricas_bu(unidad, meses, conectar_shard(unidad)))
+    else:
+        for unidad in UNIDADES_NEGOCIO:
+            calcular_metricas_bu(unidad, meses, sqlite3.connect(DB_PATH))
+
+    print("[✅] Métricas calculadas correctamente.")
+
+def calcular_metricas_bu(unidad, meses, conn):
+    """
+    Calcula las métricas de una BU para cada fecha de 'meses' y las guarda en 'historico_kpis'.
+    Todos los registros de la BU se insertan en una única transacción, que se confirma al final.
+    
+    Parámetros:
+      - unidad: La unidad de negocio a procesar.
+      - meses: Lista de fechas (último día de cada mes) en formato "YYYY-MM-DD".
+      - conn: Conexión a la base de datos a utilizar (la base única o el shard de la BU).
+              Se cierra al finalizar.
+    """
     # ------------------------------------------------------------------------------
-    # Para cada fecha (representando el último día del mes) y para cada BU, se calculan las métricas.
+    # Para cada fecha (representando el último día del mes) se calculan las métricas de la BU.
     # ------------------------------------------------------------------------------
     for mes in meses:
-        for unidad in unidades_negocio:
-            # Consultar el total de usuarios en la BU que hayan iniciado la capacitación en o antes de 'mes'
-            total_users = pd.read_sql(f"""
-                SELECT COUNT(*) as total FROM usuarios 
-                WHERE BUSINESS_UNIT = '{unidad}' AND START_DATE <= '{mes}'
-            """, conn).iloc[0]["total"]
-
-            # Si no hay usuarios para la BU en ese mes, se guarda 0 en todos los indicadores
-            if total_users == 0:
-                guardar_historico(mes, unidad, 0, 0, 0)
-                continue  # Pasar a la siguiente iteración
-
-            # Consultar el número de usuarios activos en la BU para 'mes'
-            # Un usuario se considera activo si:
-            #  - No tiene fecha de finalización (END_DATE IS NULL) o
-            #  - Su fecha de finalización es posterior o igual a 'mes'
-            # Además, se incluyen solo aquellos usuarios que hayan iniciado en o antes de 'mes'.
-            activos = pd.read_sql(f"""
-                SELECT COUNT(*) as activos FROM usuarios 
-                WHERE BUSINESS_UNIT = '{unidad}' 
-                  AND (END_DATE IS NULL OR END_DATE >= '{mes}')
-                  AND START_DATE <= '{mes}'
-            """, conn).iloc[0]["activos"]
-
-            # Calcular el porcentaje de usuarios activos respecto al total
-            porcentaje_activos = (activos / total_users) * 100
-
-            # Consultar el número de usuarios externos activos en la BU, con la misma lógica de actividad.
-            externos_activos = pd.read_sql(f"""
-                SELECT COUNT(*) as externos FROM usuarios 
-                WHERE BUSINESS_UNIT = '{unidad}' AND IS_EXTERNAL = 1 
-                  AND (END_DATE IS NULL OR END_DATE >= '{mes}')
-                  AND START_DATE <= '{mes}'
-            """, conn).iloc[0]["externos"]
-
-            porcentaje_externos = (externos_activos / total_users) * 100
-
-            # Consultar el número de usuarios (únicos, por eso se usa COUNT(DISTINCT ...)) que han completado
-            # alguna capacitación hasta 'mes', considerando solo a los usuarios activos.
-            # Se realiza un JOIN entre 'capacitaciones_por_usuario' y 'usuarios' para obtener la BU y la condición de actividad.
-            completadas = pd.read_sql(f"""
-                SELECT COUNT(DISTINCT cu.FK_USERNAME) as completadas 
-                FROM capacitaciones_por_usuario cu
-                JOIN usuarios u ON cu.FK_USERNAME = u.USERNAME
-                WHERE u.BUSINESS_UNIT = '{unidad}' 
-                  AND cu.END_DATE <= '{mes}'
-                  AND (u.END_DATE IS NULL OR u.END_DATE >= '{mes}')
-            """, conn).iloc[0]["completadas"]
-
-            # Calcular el porcentaje de capacitaciones completadas respecto a los usuarios activos.
-            porcentaje_completadas = (completadas / activos) * 100 if activos > 0 else 0
-
-            # Insertar el registro de métricas en la tabla 'historico_kpis'
-            guardar_historico(mes, unidad, porcentaje_activos, porcentaje_externos, porcentaje_completadas)
-
-    # Cerrar la conexión a la base de datos
+        # Consultar el total de usuarios en la BU que hayan iniciado la capacitación en o antes de 'mes'
+        total_users = pd.read_sql(f"""
+            SELECT COUNT(*) as total FROM usuarios 
+            WHERE BUSINESS_UNIT = '{unidad}' AND START_DATE <= '{mes}'
+        """, conn).iloc[0]["total"]
+
+        # Si no hay usuarios para la BU en ese mes, se guarda 0 en todos los indicadores
+        if total_users == 0:
+            guardar_historico(mes, unidad, 0, 0, 0, conn)
+            continue  # Pasar a la siguiente iteración
+
+        # Consultar el número de usuarios activos en la BU para 'mes'
+        # Un usuario se considera activo si:
+        #  - No tiene fecha de finalización (END_DATE IS NULL) o
+        #  - Su fecha de finalización es posterior o igual a 'mes'
+        # Además, se incluyen solo aquellos usuarios que hayan iniciado en o antes de 'mes'.
+        activos = pd.read_sql(f"""
+            SELECT COUNT(*) as activos FROM usuarios 
+            WHERE BUSINESS_UNIT = '{unidad}' 
+              AND (END_DATE IS NULL OR END_DATE >= '{mes}')
+              AND START_DATE <= '{mes}'
+        """, conn).iloc[0]["activos"]
+
+        # Calcular el porcentaje de usuarios activos respecto al total
+        porcentaje_activos = (activos / total_users) * 100
+
+        # Consultar el número de usuarios externos activos en la BU, con la misma lógica de actividad.
+        externos_activos = pd.read_sql(f"""
+            SELECT COUNT(*) as externos FROM usuarios 
+            WHERE BUSINESS_UNIT = '{unidad}' AND IS_EXTERNAL = 1 
+              AND (END_DATE IS NULL OR END_DATE >= '{mes}')
+              AND START_DATE <= '{mes}'
+        """, conn).iloc[0]["externos"]
+
+        porcentaje_externos = (externos_activos / total_users) * 100
+
+        # Consultar el número de usuarios (únicos, por eso se usa COUNT(DISTINCT ...)) que han completado
+        # alguna capacitación hasta 'mes', considerando solo a los usuarios activos.
+        # Se realiza un JOIN entre 'capacitaciones_por_usuario' y 'usuarios' para obtener la BU y la condición de actividad.
+        completadas = pd.read_sql(f"""
+            SELECT COUNT(DISTINCT cu.FK_USERNAME) as completadas 
+            FROM capacitaciones_por_usuario cu
+            JOIN usuarios u ON cu.FK_USERNAME = u.USERNAME
+            WHERE u.BUSINESS_UNIT = '{unidad}' 
+              AND cu.END_DATE <= '{mes}'
+              AND (u.END_DATE IS NULL OR u.END_DATE >= '{mes}')
+        """, conn).iloc[0]["completadas"]
+
+        # Calcular el porcentaje de capacitaciones completadas respecto a los usuarios activos.
+        porcentaje_completadas = (completadas / activos) * 100 if activos > 0 else 0
+
+        # Insertar el registro de métricas en la tabla 'historico_kpis'
+        guardar_historico(mes, unidad, porcentaje_activos, porcentaje_externos, porcentaje_completadas, conn)
+
+    # Confirmar todos los registros de la BU en una sola transacción y cerrar la conexión
+    conn.commit()
     conn.close()
-    print("[✅] Métricas calculadas correctamente.")
 
-def guardar_historico(fecha, business_unit, activos, externos, completadas):
+def guardar_historico(fecha, business_unit, activos, externos, completadas, conn=None):
     """
     Inserta un registro en la tabla 'historico_kpis' con los valores calculados.
     
@@ -109,8 +129,12 @@ def guardar_historico(fecha, business_unit, activos, externos, completadas):
       - activos: Porcentaje de usuarios activos.
       - externos: Porcentaje de usuarios externos activos.
       - completadas: Porcentaje de capacitaciones completadas (de usuarios activos).
+      - conn: Conexión a utilizar. Si se indica, el commit queda a cargo de quien la abrió;
+              si no, se abre una conexión a la base única y se confirma el registro.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conexion_propia = conn is None
+    if conexion_propia:
+        conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -118,8 +142,9 @@ def guardar_historico(fecha, business_unit, activos, externos, completadas):
     VALUES (?, ?, ?, ?, ?)
     ''', (fecha, activos, externos, completadas, business_unit))
     
-    conn.commit()
-    conn.close()
+    if conexion_propia:
+        conn.commit()
+        conn.close()
     print(f"[✅] Datos guardados para {business_unit} en {fecha}")
 
 # Ejecutar la función principal si se corre este script directamente
@@ -37,11 +37,15 @@ En este dashboard podrás visualizar:
 # Se conecta a la base de datos y se cargan los datos de:
 # - 'historico_kpis': contiene las métricas calculadas mensualmente.
 # - 'usuarios', 'capacitaciones' y 'capacitaciones_por_usuario': datos crudos para análisis adicional.
+# En el modo "shards" se usa una conexión federada que adjunta (ATTACH) el archivo de cada BU
+# y expone las tablas particionadas como vistas, por lo que las consultas no cambian.
 import os
 
+from shards import MODO_SHARDS, UNIDADES_NEGOCIO, conectar_federado
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'db', 'database.db')
 
-conn = sqlite3.connect(DB_PATH)
+conn = conectar_federado() if MODO_SHARDS else sqlite3.connect(DB_PATH)
 
 df_historico = pd.read_sql("""
     SELECT Fecha, BUSINESS_UNIT, 
@@ -64,7 +68,7 @@ st.markdown("---\n")
 # SIDEBAR: FILTROS Y BRANDING
 # ------------------------------------------------------------------------------
 st.sidebar.header("Filtros")
-business_units = ["Mercado Libre", "Mercado Pago", "Mercado Envíos"]
+business_units = UNIDADES_NEGOCIO
 selected_bu = st.sidebar.multiselect("Selecciona la Unidad de Negocio", business_units, default=business_units)
 
 st.sidebar.markdown("---")
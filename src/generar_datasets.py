@@ -6,6 +6,8 @@ from datetime import date
 # Ruta de la base de datos (se espera que ya exista la base creada con setup_db.py)
 import os
 
+from shards import MODO_SHARDS, UNIDADES_NEGOCIO, conectar_shard, verificar_shards, ejecutar_en_paralelo
+
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'db', 'database.db')
 
 
@@ -33,7 +35,7 @@ def generar_usuarios(n):
     Se utiliza un conjunto (set) para evitar duplicados en el USERNAME.
     """
     # Lista de unidades de negocio disponibles
-    unidades = ["Mercado Libre", "Mercado Pago", "Mercado Envíos"]
+    unidades = UNIDADES_NEGOCIO
     # Utilizamos un set para evitar duplicados (cada elemento es una tupla)
     users = set()
     
@@ -116,6 +118,26 @@ def generar_capacitaciones_por_usuario(users):
             ))
     return rows
 
+# ----------------------------------------------------------------------
+# Función: insertar_usuarios(cursor, usuarios, capacitaciones_por_usuario)
+# ----------------------------------------------------------------------
+def insertar_usuarios(cursor, usuarios, capacitaciones_por_usuario):
+    """
+    Inserta los usuarios y sus capacitaciones asignadas usando el cursor recibido.
+    Se comparte entre el modo "unico" (una sola base) y el modo "shards" (una base por BU).
+    """
+    # Insertar datos en la tabla 'usuarios'
+    cursor.executemany('''
+    INSERT INTO usuarios (USERNAME, START_DATE, END_DATE, BUSINESS_UNIT, MANAGER, LAST_UPDATE, IS_EXTERNAL)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', usuarios)
+
+    # Insertar datos en la tabla 'capacitaciones_por_usuario'
+    cursor.executemany('''
+    INSERT INTO capacitaciones_por_usuario (FK_USERNAME, FK_TRAINING, END_DATE, ASSIGNMENT_DATE)
+    VALUES (?, ?, ?, ?)
+    ''', capacitaciones_por_usuario)
+
 # ----------------------------------------------------------------------
 # Función: insertar_datos()
 # ----------------------------------------------------------------------
@@ -131,7 +153,16 @@ def insertar_datos():
       - 'usuarios'
       - 'capacitaciones'
       - 'capacitaciones_por_usuario'
+
+    En el modo "shards", 'capacitaciones' se inserta en db/database.db y los usuarios
+    (junto con sus capacitaciones asignadas) se reparten por BU, escribiendo todos los
+    shards en paralelo.
     """
+    # En el modo "shards", verificar que existan todos los shards antes de escribir nada,
+    # para no dejar el catálogo insertado y la carga de usuarios a medio hacer.
+    if MODO_SHARDS:
+        verificar_shards()
+
     # Conectar a la base de datos
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -141,23 +172,35 @@ def insertar_datos():
     capacitaciones = generar_capacitaciones()
     capacitaciones_por_usuario = generar_capacitaciones_por_usuario(usuarios)
 
-    # Insertar datos en la tabla 'usuarios'
-    cursor.executemany('''
-    INSERT INTO usuarios (USERNAME, START_DATE, END_DATE, BUSINESS_UNIT, MANAGER, LAST_UPDATE, IS_EXTERNAL)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', usuarios)
-
     # Insertar datos en la tabla 'capacitaciones'
     cursor.executemany('''
     INSERT INTO capacitaciones (NAME, LINK, CREATION_DATE)
     VALUES (?, ?, ?)
     ''', capacitaciones)
 
-    # Insertar datos en la tabla 'capacitaciones_por_usuario'
-    cursor.executemany('''
-    INSERT INTO capacitaciones_por_usuario (FK_USERNAME, FK_TRAINING, END_DATE, ASSIGNMENT_DATE)
-    VALUES (?, ?, ?, ?)
-    ''', capacitaciones_por_usuario)
+    if MODO_SHARDS:
+        # Guardar el catálogo antes de escribir los shards
+        conn.commit()
+        conn.close()
+
+        # Mapear cada username a su BU para repartir las capacitaciones asignadas
+        bu_por_usuario = {u[0]: u[3] for u in usuarios}
+
+        def insertar_shard(unidad):
+            conn_shard = conectar_shard(unidad)
+            insertar_usuarios(
+                conn_shard.cursor(),
+                [u for u in usuarios if u[3] == unidad],
+                [c for c in capacitaciones_por_usuario if bu_por_usuario[c[0]] == unidad]
+            )
+            conn_shard.commit()
+            conn_shard.close()
+
+        ejecutar_en_paralelo(insertar_shard)
+        print("[✅] Datos ficticios insertados en los shards por BU")
+        return
+
+    insertar_usuarios(cursor, usuarios, capacitaciones_por_usuario)
 
     # Guardar los cambios y cerrar la conexión
     conn.commit()
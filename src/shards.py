@@ -0,0 +1,182 @@
+import sqlite3
+import os
+import unicodedata
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# ------------------------------------------------------------------------------
+# ALMACENAMIENTO PARTICIONADO (SHARDS) POR UNIDAD DE NEGOCIO
+# ------------------------------------------------------------------------------
+# En el modo por defecto ("unico") todo vive en db/database.db, por lo que la carga
+# de datos, el cálculo de métricas y el dashboard compiten por un único archivo y
+# un único lock de escritura de SQLite.
+#
+# En el modo "shards" las tablas 'usuarios', 'capacitaciones_por_usuario' y
+# 'historico_kpis' se particionan en un archivo por BU (db/shards/<bu>.db). Cada
+# archivo tiene su propio lock, de modo que las escrituras de cada BU pueden
+# correr en paralelo. La tabla 'capacitaciones' es un catálogo compartido y sigue
+# en db/database.db.
+#
+# El modo se selecciona con la variable de entorno MODO_ALMACENAMIENTO:
+#   MODO_ALMACENAMIENTO=shards python src/generar_datasets.py
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'db', 'database.db')
+SHARDS_DIR = os.path.join(os.path.dirname(__file__), '..', 'db', 'shards')
+
+# Mismos valores que las restricciones CHECK de BUSINESS_UNIT en setup_db.py
+UNIDADES_NEGOCIO = ["Mercado Libre", "Mercado Pago", "Mercado Envíos"]
+
+MODO_SHARDS = os.environ.get("MODO_ALMACENAMIENTO", "unico") == "shards"
+
+
+def nombre_shard(business_unit):
+    """
+    Devuelve un identificador seguro (sin acentos ni espacios) para la BU,
+    usado tanto como nombre de archivo como alias en ATTACH.
+    Por ejemplo: 'Mercado Envíos' -> 'mercado_envios'.
+    """
+    sin_acentos = unicodedata.normalize("NFKD", business_unit).encode("ascii", "ignore").decode("ascii")
+    return sin_acentos.lower().replace(" ", "_")
+
+
+def shard_path(business_unit):
+    """
+    Devuelve la ruta del archivo de base de datos correspondiente a la BU.
+    """
+    return os.path.join(SHARDS_DIR, f"{nombre_shard(business_unit)}.db")
+
+
+def uri_sqlite(path, modo):
+    """
+    Devuelve la URI de SQLite para abrir 'path' con el modo indicado ('ro' o 'rw').
+    A diferencia de una ruta simple, estos modos no crean el archivo si no existe.
+    """
+    return f"{Path(path).resolve().as_uri()}?mode={modo}"
+
+
+def verificar_shards():
+    """
+    Verifica que existan los archivos de todas las BUs antes de leer o escribir en ellos.
+    Lanza FileNotFoundError indicando cómo crearlos, en lugar de dejar que SQLite cree
+    shards vacíos o falle a mitad de una carga.
+    """
+    faltantes = [os.path.normpath(shard_path(unidad)) for unidad in UNIDADES_NEGOCIO if not os.path.exists(shard_path(unidad))]
+    if faltantes:
+        raise FileNotFoundError(
+            "No se encontraron los shards: " + ", ".join(faltantes)
+            + ". Ejecuta 'python shards.py' para crearlos."
+        )
+
+
+def conectar_shard(business_unit):
+    """
+    Abre una conexión de escritura al shard de la BU en modo 'rw': si el archivo no existe
+    falla en lugar de crear un shard vacío sin tablas.
+    """
+    return sqlite3.connect(uri_sqlite(shard_path(business_unit), "rw"), uri=True)
+
+
+def crear_shards():
+    """
+    Crea (desde cero) un archivo de base de datos por cada BU con las tablas particionadas.
+
+    El esquema es el mismo que en setup_db.py, con dos diferencias:
+      - El CHECK de BUSINESS_UNIT restringe cada shard a su propia BU.
+      - 'capacitaciones_por_usuario' no declara la clave foránea a 'capacitaciones',
+        ya que SQLite no admite claves foráneas entre archivos distintos.
+    """
+    os.makedirs(SHARDS_DIR, exist_ok=True)
+
+    for unidad in UNIDADES_NEGOCIO:
+        path = shard_path(unidad)
+        # 🔥 Al igual que en setup_db.py, se elimina el shard existente para empezar limpio
+        if os.path.exists(path):
+            os.remove(path)
+
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA foreign_keys = ON;")
+
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            USERNAME TEXT UNIQUE NOT NULL,
+            START_DATE TEXT NOT NULL,
+            END_DATE TEXT NULL,
+            BUSINESS_UNIT TEXT NOT NULL CHECK(BUSINESS_UNIT = '{unidad}'),
+            MANAGER TEXT NOT NULL,
+            LAST_UPDATE TEXT NOT NULL,
+            IS_EXTERNAL BOOLEAN NOT NULL CHECK(IS_EXTERNAL IN (0,1))
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS capacitaciones_por_usuario (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            FK_USERNAME TEXT NOT NULL,
+            FK_TRAINING INTEGER NOT NULL,
+            END_DATE TEXT NULL,
+            ASSIGNMENT_DATE TEXT NOT NULL,
+            FOREIGN KEY (FK_USERNAME) REFERENCES usuarios(USERNAME) ON DELETE CASCADE
+        )
+        ''')
+
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS historico_kpis (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Fecha TEXT NOT NULL,
+            Usuarios_Activos REAL NOT NULL,
+            Usuarios_Externos REAL NOT NULL,
+            Capacitaciones_Completadas REAL NOT NULL,
+            BUSINESS_UNIT TEXT NOT NULL CHECK(BUSINESS_UNIT = '{unidad}')
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+        print(f"[✅] Shard creado para {unidad}: {path}")
+
+
+def ejecutar_en_paralelo(funcion):
+    """
+    Ejecuta funcion(business_unit) para cada BU en un hilo propio y devuelve los resultados
+    en el mismo orden que UNIDADES_NEGOCIO.
+
+    Cada BU escribe en su propio archivo, por lo que no hay contención por el lock de
+    escritura entre hilos (sqlite3 libera el GIL mientras ejecuta las consultas).
+    La función debe abrir su propia conexión: las conexiones de sqlite3 no se comparten entre hilos.
+    """
+    with ThreadPoolExecutor(max_workers=len(UNIDADES_NEGOCIO)) as executor:
+        return list(executor.map(funcion, UNIDADES_NEGOCIO))
+
+
+def conectar_federado():
+    """
+    Abre una conexión de solo lectura "federada" para el dashboard.
+
+    Se conecta a db/database.db (catálogo 'capacitaciones') y adjunta cada shard con ATTACH,
+    todos en modo 'ro' para que el dashboard nunca cree ni modifique archivos. Luego
+    crea vistas temporales 'usuarios', 'capacitaciones_por_usuario' e 'historico_kpis'
+    que unen (UNION ALL) las tablas de todas las BUs. Como el esquema 'temp' tiene prioridad
+    sobre 'main', las consultas existentes funcionan sin cambios.
+    """
+    verificar_shards()
+
+    conn = sqlite3.connect(uri_sqlite(DB_PATH, "ro"), uri=True)
+    cursor = conn.cursor()
+
+    for unidad in UNIDADES_NEGOCIO:
+        cursor.execute("ATTACH DATABASE ? AS " + nombre_shard(unidad), (uri_sqlite(shard_path(unidad), "ro"),))
+
+    for tabla in ["usuarios", "capacitaciones_por_usuario", "historico_kpis"]:
+        union = "\nUNION ALL\n".join(
+            f"SELECT * FROM {nombre_shard(unidad)}.{tabla}" for unidad in UNIDADES_NEGOCIO
+        )
+        cursor.execute(f"CREATE TEMP VIEW {tabla} AS {union}")
+
+    return conn
+
+
+# Crear los shards si se corre este script directamente (equivalente a setup_db.py para el modo "shards")
+if __name__ == "__main__":
+    crear_shards()